@@ -1,43 +1,166 @@
 import os
-import io
-import json
-from typing import List, Dict, Any
+import asyncio
+import logging
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import List, Dict, Any, Optional
 
-from fastapi import FastAPI, UploadFile, File, Form, HTTPException
-from fastapi.responses import JSONResponse
+from fastapi import FastAPI, UploadFile, File, Form, HTTPException, Query, Body
+from fastapi.responses import ORJSONResponse, StreamingResponse
 from fastapi.staticfiles import StaticFiles
-
-from fastapi import Body
-from fastapi.responses import JSONResponse
-import mysql.connector
+import orjson
 
 from api.db import get_connection  # import from db.py
+from api.cache import cached_score
+from api.config import (
+	MODEL_NAME,
+	MAX_EXTRACT,
+	MAX_SCORE,
+	OCR_LANG,
+	LOW_CHAR_THRESHOLD,
+	MAX_UPLOAD_BYTES,
+	UPLOAD_CHUNK_BYTES,
+	DB_INSERT_WORKERS,
+)
 
 # Reuse extraction and scoring from src
 from src.main import (
 	extract_pdf_text,
 	extract_docx_text,
 	score_resume,
+	warmup_extraction,
+	init_ocr_worker,
+	_client,
 	_truncate,
 )
 
-# Backend constants
-MODEL_NAME = "llama-3.3-70b-versatile"
-MAX_EXTRACT = 5
-MAX_SCORE = 5
-OCR_LANG = "eng"
-LOW_CHAR_THRESHOLD = 200
+logger = logging.getLogger(__name__)
 
 app = FastAPI(title="Resume Screener API")
 
 
+# Never fork the API process: by the time a pool (re)starts workers it runs DB,
+# anyio and possibly torch threads, and forking with threads can deadlock.
+# The forkserver is started from a clean process that preloads only src.main.
+if "forkserver" in multiprocessing.get_all_start_methods():
+	_MP_CONTEXT = multiprocessing.get_context("forkserver")
+	_MP_CONTEXT.set_forkserver_preload(["src.main"])
+else:
+	_MP_CONTEXT = multiprocessing.get_context("spawn")
+
+
+def _new_extract_pool(max_workers: int = MAX_EXTRACT) -> ProcessPoolExecutor:
+	# The OCR thread limits are applied only inside these workers, not the API process
+	return ProcessPoolExecutor(
+		max_workers=max_workers,
+		mp_context=_MP_CONTEXT,
+		initializer=init_ocr_worker,
+	)
+
+
+# PyMuPDF is not thread-safe, so extraction runs in worker processes
+_EXTRACT_POOL = _new_extract_pool()
+# Bounded so concurrent screens cannot check out the whole MySQL pool
+_DB_EXECUTOR = ThreadPoolExecutor(max_workers=DB_INSERT_WORKERS, thread_name_prefix="db")
+
+
+def _extract_one(name: str, data: bytes, ocr_workers: int) -> Optional[str]:
+	lower = name.lower()
+	if lower.endswith(".pdf"):
+		return extract_pdf_text(data, ocr_on_demand=True, lang=OCR_LANG, low_char_threshold=int(LOW_CHAR_THRESHOLD), ocr_workers=ocr_workers)
+	if lower.endswith(".docx"):
+		return extract_docx_text(data)
+	return None
+
+
+async def _run_extract(name: str, data: bytes, ocr_workers: int) -> Optional[str]:
+	# A worker that dies (segfault, OOM kill) breaks the whole pool: replace the pool, then
+	# retry the file once in its own single-worker pool so a repeat crash hits only this file
+	global _EXTRACT_POOL
+	loop = asyncio.get_running_loop()
+	pool = _EXTRACT_POOL
+	try:
+		return await loop.run_in_executor(pool, _extract_one, name, data, ocr_workers)
+	except BrokenProcessPool:
+		logger.error("Extraction worker died while processing %s; retrying", name)
+		if _EXTRACT_POOL is pool:
+			pool.shutdown(wait=False, cancel_futures=True)
+			_EXTRACT_POOL = _new_extract_pool()
+	solo = _new_extract_pool(max_workers=1)
+	try:
+		return await loop.run_in_executor(solo, _extract_one, name, data, ocr_workers)
+	finally:
+		solo.shutdown(wait=False)
+
+
+async def _read_upload(f: UploadFile) -> bytes:
+	name = f.filename or "resume"
+	if f.size is not None and f.size > MAX_UPLOAD_BYTES:
+		raise HTTPException(status_code=413, detail=f"{name} exceeds {MAX_UPLOAD_BYTES} bytes")
+	buf = bytearray()
+	while chunk := await f.read(UPLOAD_CHUNK_BYTES):
+		if len(buf) + len(chunk) > MAX_UPLOAD_BYTES:
+			raise HTTPException(status_code=413, detail=f"{name} exceeds {MAX_UPLOAD_BYTES} bytes")
+		buf += chunk
+	return bytes(buf)
+
+
+INSERT_RESULT_QUERY = """
+    INSERT INTO screening_results
+    (jd_text, file_name, candidate_name, resume_text, final_score, hard_filter_pass, explanation, top_reasons, risks)
+    VALUES (%s,%s,%s,%s,%s,%s,%s,%s,%s)
+"""
+
+
+def _insert_result(jd_text: str, rec: Dict[str, Any]) -> int:
+	conn = get_connection()
+	try:
+		cursor = conn.cursor()
+		cursor.execute(INSERT_RESULT_QUERY, (
+			jd_text,
+			rec.get("file"),
+			rec.get("candidate_name"),
+			rec.get("resume_text"),
+			rec.get("final_score"),
+			rec.get("hard_filter_pass"),
+			rec.get("explanation"),
+			"|".join(rec.get("top_reasons", [])),
+			"|".join(rec.get("risks", []))
+		))
+		row_id = cursor.lastrowid
+		conn.commit()
+		cursor.close()
+		return row_id
+	finally:
+		conn.close()
+
+
+@app.on_event("startup")
+async def warmup() -> None:
+	# Start every extraction worker and warm its PyMuPDF/Tesseract stack
+	loop = asyncio.get_running_loop()
+	await asyncio.gather(
+		*(loop.run_in_executor(_EXTRACT_POOL, warmup_extraction) for _ in range(MAX_EXTRACT)),
+		return_exceptions=True,
+	)
+	if os.environ.get("GROQ_API_KEY"):
+		_client()
+
+
+@app.on_event("shutdown")
+def shutdown_extract_pool() -> None:
+	_EXTRACT_POOL.shutdown(wait=False, cancel_futures=True)
+	_DB_EXECUTOR.shutdown(wait=False)
+
+
 @app.get("/api/health")
 def health() -> Dict[str, str]:
 	return {"status": "ok"}
 
 
 @app.post("/api/screen")
-async def screen(files: List[UploadFile] = File(...), jd_text: str = Form(...)) -> JSONResponse:
+async def screen(files: List[UploadFile] = File(...), jd_text: str = Form(...)) -> StreamingResponse:
     if not os.environ.get("GROQ_API_KEY"):
         raise HTTPException(status_code=500, detail="GROQ_API_KEY not set on server")
     if not files:
@@ -45,92 +168,131 @@ async def screen(files: List[UploadFile] = File(...), jd_text: str = Form(...))
     if not jd_text.strip():
         raise HTTPException(status_code=400, detail="JD text is required")
 
+    uploads = files[: MAX_EXTRACT]
+    names = [f.filename or "resume" for f in uploads]
+    datas = await asyncio.gather(*(_read_upload(f) for f in uploads))
+    # Share the cores between the files in this request for per-page OCR
+    ocr_workers = max(1, (os.cpu_count() or 1) // len(uploads))
+
+    results = await asyncio.gather(
+        *(_run_extract(name, data, ocr_workers) for name, data in zip(names, datas)),
+        return_exceptions=True,
+    )
+
     texts: List[Dict[str, Any]] = []
-    for f in files[: MAX_EXTRACT]:
-        name = f.filename or "resume"
-        data = await f.read()
-        try:
-            if name.lower().endswith(".pdf"):
-                text = extract_pdf_text(data, ocr_on_demand=True, lang=OCR_LANG, low_char_threshold=int(LOW_CHAR_THRESHOLD))
-            elif name.lower().endswith(".docx"):
-                text = extract_docx_text(data)
-            else:
-                continue
-            texts.append({"file": name, "text": text})
-        except Exception:
+    worker_crashed = False
+    for name, text in zip(names, results):
+        if isinstance(text, BaseException):
+            logger.error("Failed to extract %s", name, exc_info=text)
+            worker_crashed = worker_crashed or isinstance(text, BrokenProcessPool)
             continue
+        if text is None:
+            continue
+        texts.append({"file": name, "text": text})
 
     if not texts:
+        if worker_crashed:
+            raise HTTPException(status_code=500, detail="Resume extraction worker crashed")
         raise HTTPException(status_code=400, detail="No valid resumes extracted")
 
-    rows: List[Dict[str, Any]] = []
     jd_t = _truncate(jd_text)
 
-    conn = get_connection()
-    cursor = conn.cursor(dictionary=True)
+    async def score_one(item: Dict[str, Any]) -> Dict[str, Any]:
+        # Never raises: failures become an "error" field so the client can show them
+        try:
+            res_text = _truncate(item["text"])
+            rec = await cached_score(MODEL_NAME, jd_t, res_text, score_resume)
+        except Exception as e:
+            logger.exception("Scoring failed for %s", item["file"])
+            return {"file": item["file"], "id": None, "error": f"Scoring failed: {e}"}
+        rec["file"] = item["file"]
+        rec["resume_text"] = res_text
+        try:
+            loop = asyncio.get_running_loop()
+            rec["id"] = await loop.run_in_executor(_DB_EXECUTOR, _insert_result, jd_text, rec)  # return row id to frontend
+        except Exception as e:
+            # Keep the (already paid for) score; it just cannot be saved as a selection
+            logger.exception("Saving the result for %s failed", item["file"])
+            rec["id"] = None
+            rec["error"] = f"Result not saved: {e}"
+        return rec
 
-    for item in texts[: MAX_SCORE]:
-        fname = item["file"]
-        res_text = _truncate(item["text"])
-        rec = score_resume(MODEL_NAME, jd_t, res_text)
+    async def stream():
+        # One NDJSON line per resume, in completion order
+        tasks = [asyncio.create_task(score_one(item)) for item in texts[: MAX_SCORE]]
+        try:
+            for fut in asyncio.as_completed(tasks):
+                yield orjson.dumps(await fut) + b"\n"
+        finally:
+            for t in tasks:
+                t.cancel()
 
-        rec["file"] = fname
-        rec["resume_text"] = res_text
+    return StreamingResponse(stream(), media_type="application/x-ndjson")
 
-        # Insert into DB
-        insert_query = """
-            INSERT INTO screening_results
-            (jd_text, file_name, candidate_name, resume_text, final_score, hard_filter_pass, explanation, top_reasons, risks)
-            VALUES (%s,%s,%s,%s,%s,%s,%s,%s,%s)
-        """
-        cursor.execute(insert_query, (
-            jd_text,
-            rec.get("file"),
-            rec.get("candidate_name"),
-            res_text,
-            rec.get("final_score"),
-            rec.get("hard_filter_pass"),
-            rec.get("explanation"),
-            "|".join(rec.get("top_reasons", [])),
-            "|".join(rec.get("risks", []))
-        ))
-        rec["id"] = cursor.lastrowid  # return row id to frontend
-        rows.append(rec)
 
-    conn.commit()
-    cursor.close()
-    conn.close()
 
-    rows.sort(key=lambda r: r.get("final_score", 0), reverse=True)
-    return JSONResponse(content=rows)
 
+@app.get("/api/results")
+def results(limit: int = Query(50, ge=1, le=500)) -> ORJSONResponse:
+    # Served from idx_final_score (api/migrations/001_final_score_index.sql)
+    query = """
+        SELECT id, file_name, candidate_name, final_score, hard_filter_pass, explanation,
+               top_reasons, risks, manually_selected, manual_reason
+        FROM screening_results
+        ORDER BY final_score DESC
+        LIMIT %s
+    """
+    conn = get_connection()
+    try:
+        cursor = conn.cursor(dictionary=True)
+        cursor.execute(query, (limit,))
+        db_rows = cursor.fetchall()
+        cursor.close()
+    finally:
+        conn.close()
 
+    rows: List[Dict[str, Any]] = []
+    for r in db_rows:
+        rows.append({
+            "id": r["id"],
+            "file": r["file_name"],
+            "candidate_name": r["candidate_name"],
+            "final_score": float(r["final_score"]) if r["final_score"] is not None else None,
+            "hard_filter_pass": bool(r["hard_filter_pass"]),
+            "explanation": r["explanation"],
+            "top_reasons": r["top_reasons"].split("|") if r["top_reasons"] else [],
+            "risks": r["risks"].split("|") if r["risks"] else [],
+            "manually_selected": bool(r["manually_selected"]),
+            "manual_reason": r["manual_reason"],
+        })
+    return ORJSONResponse(content=rows)
 
 
 @app.post("/api/save_selection")
-async def save_selection(payload: List[Dict[str, Any]] = Body(...)):
+def save_selection(payload: List[Dict[str, Any]] = Body(...)):
+    update_query = """
+        UPDATE screening_results
+        SET manually_selected = %s, manual_reason = %s
+        WHERE id = %s
+    """
     try:
         conn = get_connection()
-        cursor = conn.cursor()
-
-        for row in payload:
-            update_query = """
-                UPDATE screening_results
-                SET manually_selected = %s, manual_reason = %s
-                WHERE id = %s
-            """
-            cursor.execute(update_query, (
-                row.get("manually_selected", False),
-                row.get("manual_reason"),
-                row.get("id")   # must come from /api/screen response
-            ))
-
-        conn.commit()
-        cursor.close()
-        conn.close()
-        return JSONResponse({"status": "ok"})
+        try:
+            cursor = conn.cursor()
+            for row in payload:
+                cursor.execute(update_query, (
+                    row.get("manually_selected", False),
+                    row.get("manual_reason"),
+                    row.get("id")   # must come from /api/screen response
+                ))
+            conn.commit()
+            cursor.close()
+        finally:
+            conn.close()
+        return ORJSONResponse({"status": "ok"})
     except Exception as e:
-        return JSONResponse({"error": str(e)}, status_code=500)
-	
+        return ORJSONResponse({"error": str(e)}, status_code=500)
+
+
 # Serve frontend
 app.mount("/", StaticFiles(directory="web", html=True), name="web")
\ No newline at end of file
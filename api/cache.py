@@ -0,0 +1,201 @@
+import os
+import asyncio
+import hashlib
+import threading
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Tuple
+
+import numpy as np
+import orjson
+
+try:
+    import redis.asyncio as aioredis  # optional
+except Exception:
+    aioredis = None
+
+try:
+    from sentence_transformers import SentenceTransformer  # optional
+except Exception:
+    SentenceTransformer = None
+
+from src.main import PROMPT_VERSION
+
+# L1: exact (model, JD, resume, prompt) hash in Redis, enabled by REDIS_URL
+CACHE_TTL = 86400
+REDIS_URL = os.getenv("REDIS_URL")
+
+# L2: in-process embedding index over (JD, resume) pairs, enabled by SEMANTIC_CACHE=1
+SEMANTIC_CACHE = os.getenv("SEMANTIC_CACHE", "").lower() in {"1", "true", "yes"}
+EMBED_MODEL = "sentence-transformers/all-MiniLM-L6-v2"
+SIMILARITY_THRESHOLD = 0.95
+MAX_SEMANTIC_ENTRIES = 2000
+# all-MiniLM-L6-v2 truncates at 256 word pieces (~1 KB of text), so documents
+# are embedded in chunks below that and compared chunk by chunk
+CHUNK_CHARS = 800
+# Only these fields carry over from an approximate hit; free text (explanation,
+# reasons, risks, penalties, evidence, name) describes the other candidate
+SEMANTIC_REUSE_FIELDS = (
+    "final_score",
+    "hard_filter_pass",
+    "skill_coverage",
+    "project_relevance",
+    "role_alignment",
+    "education_fit",
+)
+SEMANTIC_HIT_EXPLANATION = "Score reused from a near-identical earlier screening; no per-candidate explanation."
+
+_redis = None
+_embedder = None
+_embedder_lock = threading.Lock()
+
+# JD and resume are embedded separately and both must clear the threshold,
+# otherwise a long shared JD would dominate the similarity of the pair.
+# Mean chunk vectors prefilter candidates; the per-chunk check decides.
+_jd_means: Optional[np.ndarray] = None
+_res_means: Optional[np.ndarray] = None
+_entries: List[Tuple[str, np.ndarray, np.ndarray, Dict[str, Any]]] = []  # (model, jd chunks, resume chunks, rec)
+
+
+def cache_key(model: str, jd_text: str, resume_text: str) -> str:
+    raw = "\x1f".join((model, jd_text, resume_text, PROMPT_VERSION))
+    digest = hashlib.sha256(raw.encode("utf-8")).hexdigest()
+    return f"score:{digest}"
+
+
+def _redis_client():
+    global _redis
+    if _redis is None and REDIS_URL and aioredis is not None:
+        _redis = aioredis.from_url(REDIS_URL)
+    return _redis
+
+
+def _get_embedder():
+    global _embedder
+    if _embedder is None:
+        with _embedder_lock:
+            if _embedder is None:
+                _embedder = SentenceTransformer(EMBED_MODEL)
+    return _embedder
+
+
+def _chunks(text: str) -> List[str]:
+    return [text[i:i + CHUNK_CHARS] for i in range(0, len(text), CHUNK_CHARS)] or [""]
+
+
+def _embed(jd_text: str, resume_text: str) -> Tuple[np.ndarray, np.ndarray]:
+    jd_chunks = _chunks(jd_text)
+    res_chunks = _chunks(resume_text)
+    vecs = _get_embedder().encode(jd_chunks + res_chunks, normalize_embeddings=True)
+    return vecs[: len(jd_chunks)], vecs[len(jd_chunks):]
+
+
+def _mean_unit(chunks: np.ndarray) -> np.ndarray:
+    mean = chunks.mean(axis=0)
+    return mean / (np.linalg.norm(mean) or 1.0)
+
+
+def _chunk_sim(a: np.ndarray, b: np.ndarray) -> float:
+    # Documents match only if every aligned chunk does, so a shared opening
+    # (company boilerplate, resume template) cannot carry the comparison
+    if a.shape != b.shape:
+        return 0.0
+    return float(np.min(np.sum(a * b, axis=1)))
+
+
+def _semantic_enabled() -> bool:
+    return SEMANTIC_CACHE and SentenceTransformer is not None
+
+
+def _semantic_record(rec: Dict[str, Any]) -> Dict[str, Any]:
+    out: Dict[str, Any] = {
+        "candidate_name": None,
+        "penalties": [],
+        "top_reasons": [],
+        "risks": [],
+        "evidence_snippets": [],
+        "explanation": SEMANTIC_HIT_EXPLANATION,
+    }
+    out.update({k: rec.get(k) for k in SEMANTIC_REUSE_FIELDS})
+    return out
+
+
+def _semantic_lookup(model: str, jd_chunks: np.ndarray, res_chunks: np.ndarray) -> Optional[Dict[str, Any]]:
+    if _jd_means is None or not _entries:
+        return None
+    sims = np.minimum(_jd_means @ _mean_unit(jd_chunks), _res_means @ _mean_unit(res_chunks))
+    for i in np.argsort(-sims):
+        if sims[i] < SIMILARITY_THRESHOLD:
+            break
+        entry_model, entry_jd, entry_res, rec = _entries[i]
+        if entry_model != model:
+            continue
+        if min(_chunk_sim(jd_chunks, entry_jd), _chunk_sim(res_chunks, entry_res)) >= SIMILARITY_THRESHOLD:
+            return _semantic_record(rec)
+    return None
+
+
+def _semantic_add(model: str, jd_chunks: np.ndarray, res_chunks: np.ndarray, rec: Dict[str, Any]) -> None:
+    global _jd_means, _res_means, _entries
+    jd_mean = _mean_unit(jd_chunks)[None, :]
+    res_mean = _mean_unit(res_chunks)[None, :]
+    if _jd_means is None:
+        _jd_means, _res_means = jd_mean, res_mean
+    else:
+        _jd_means = np.vstack([_jd_means, jd_mean])[-MAX_SEMANTIC_ENTRIES:]
+        _res_means = np.vstack([_res_means, res_mean])[-MAX_SEMANTIC_ENTRIES:]
+    _entries = (_entries + [(model, jd_chunks, res_chunks, dict(rec))])[-MAX_SEMANTIC_ENTRIES:]
+
+
+async def _redis_get(key: str) -> Optional[Dict[str, Any]]:
+    client = _redis_client()
+    if client is None:
+        return None
+    try:
+        raw = await client.get(key)
+        return orjson.loads(raw) if raw else None
+    except Exception:
+        return None
+
+
+async def _redis_set(key: str, rec: Dict[str, Any]) -> None:
+    client = _redis_client()
+    if client is None:
+        return
+    try:
+        await client.setex(key, CACHE_TTL, orjson.dumps(rec))
+    except Exception:
+        pass
+
+
+def _is_fallback(rec: Dict[str, Any]) -> bool:
+    # score_resume returns an empty zero-score record when both LLM calls fail
+    return not rec.get("final_score") and not rec.get("explanation")
+
+
+async def cached_score(
+    model: str,
+    jd_text: str,
+    resume_text: str,
+    scorer: Callable[[str, str, str], Awaitable[Dict[str, Any]]],
+) -> Dict[str, Any]:
+    key = cache_key(model, jd_text, resume_text)
+    rec = await _redis_get(key)
+    if rec is not None:
+        return rec
+
+    embedded = None
+    if _semantic_enabled():
+        try:
+            embedded = await asyncio.to_thread(_embed, jd_text, resume_text)
+            rec = _semantic_lookup(model, *embedded)
+        except Exception:
+            embedded = None
+        if rec is not None:
+            # Approximate hit: not written back to the exact-match L1 cache
+            return rec
+
+    rec = await scorer(model, jd_text, resume_text)
+    if not _is_fallback(rec):
+        await _redis_set(key, rec)
+        if embedded is not None:
+            _semantic_add(model, *embedded, rec)
+    return rec
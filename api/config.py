@@ -0,0 +1,9 @@
+# Backend constants
+MODEL_NAME = "llama-3.3-70b-versatile"
+MAX_EXTRACT = 5
+MAX_SCORE = 5
+OCR_LANG = "eng"
+LOW_CHAR_THRESHOLD = 200
+MAX_UPLOAD_BYTES = 5 * 1024 * 1024  # matches the frontend MAX_FILE_SIZE
+UPLOAD_CHUNK_BYTES = 1 << 20
+DB_INSERT_WORKERS = 16  # threads writing /api/screen results; keep below api.db.POOL_SIZE
@@ -1,15 +1,56 @@
-import mysql.connector
-from mysql.connector import MySQLConnection
+from mysql.connector import errors, pooling
+from mysql.connector.pooling import PooledMySQLConnection
 from dotenv import load_dotenv
 import os
+import threading
+import time
+from typing import Optional
 
 # load env file
 load_dotenv()
 
-def get_connection() -> MySQLConnection:
-    return mysql.connector.connect(
-        host=os.getenv("DB_HOST"),
-        user=os.getenv("DB_USER"),
-        password=os.getenv("DB_PASS"),
-        database=os.getenv("DB_NAME"),
-    )
+POOL_NAME = "rs"
+# mysql-connector caps pools at 32. /api/screen inserts run on a dedicated
+# executor of DB_INSERT_WORKERS threads (api/config.py), which leaves the rest
+# for the sync endpoints running on FastAPI's threadpool.
+POOL_SIZE = 32
+# The pool never blocks on its own; wait up to this long for a free connection
+POOL_TIMEOUT = 10.0
+POOL_RETRY_DELAY = 0.05
+
+_POOL: Optional[pooling.MySQLConnectionPool] = None
+_POOL_LOCK = threading.Lock()
+
+
+def _pool() -> pooling.MySQLConnectionPool:
+    # Built on first use so importing this module never connects; the
+    # extraction worker processes import api.app but never touch the DB.
+    global _POOL
+    if _POOL is None:
+        with _POOL_LOCK:
+            if _POOL is None:
+                _POOL = pooling.MySQLConnectionPool(
+                    pool_name=POOL_NAME,
+                    pool_size=POOL_SIZE,
+                    pool_reset_session=False,
+                    host=os.getenv("DB_HOST"),
+                    user=os.getenv("DB_USER"),
+                    password=os.getenv("DB_PASS"),
+                    database=os.getenv("DB_NAME"),
+                )
+    return _POOL
+
+
+def get_connection() -> PooledMySQLConnection:
+    # Blocks the calling thread until a connection frees up or POOL_TIMEOUT
+    # passes; close() on the returned connection hands it back to the pool.
+    # Call from a worker thread, never directly on the event loop.
+    pool = _pool()
+    deadline = time.monotonic() + POOL_TIMEOUT
+    while True:
+        try:
+            return pool.get_connection()
+        except errors.PoolError:
+            if time.monotonic() >= deadline:
+                raise
+            time.sleep(POOL_RETRY_DELAY)
@@ -0,0 +1,4 @@
+-- Index for listing screening results by score (GET /api/results).
+-- `id` is the AUTO_INCREMENT primary key, so lookups by id are already indexed.
+ALTER TABLE screening_results
+    ADD INDEX idx_final_score (final_score DESC);
@@ -1,10 +1,13 @@
 import os
 import io
 import json
+import asyncio
 import csv
 import re
+import threading
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
-from typing import List, Dict, Any, Tuple
+from typing import List, Dict, Any, Optional, Tuple
 
 try:
 	from dotenv import load_dotenv  # optional
@@ -13,34 +16,40 @@ except Exception:
 	pass
 
 import fitz  # PyMuPDF
-from pdf2image import convert_from_bytes
 from PIL import Image
 import pytesseract
 from docx import Document
-from groq import Groq
+import httpx
+import orjson
+from pydantic import BaseModel, field_validator
+from groq import AsyncGroq, DefaultAsyncHttpxClient
 
 # -------------------------
 # Utilities
 # -------------------------
 
+_RE_WS = re.compile(r"\s+")
+_RE_HYPH = re.compile(r"([A-Za-z])\-\n([A-Za-z])")
+
+
 def clean_whitespace(text: str) -> str:
 	if not text:
 		return ""
-	text = text.replace("\x00", " ")
-	text = re.sub(r"[\r\t]+", " ", text)
-	text = re.sub(r"\s+", " ", text)
-	return text.strip()
+	# \s+ already covers \r and \t, so a single substitution is enough
+	return _RE_WS.sub(" ", text.replace("\x00", " ")).strip()
 
 
 def fix_hyphenation(text: str) -> str:
-	return re.sub(r"([A-Za-z])\-\n([A-Za-z])", r"\1\2", text)
+	return _RE_HYPH.sub(r"\1\2", text)
 
 
 def drop_repeating_headers(pages: List[str]) -> List[str]:
 	if not pages:
 		return pages
-	first_lines = [p.splitlines()[0].strip() for p in pages if p.strip()]
-	last_lines = [p.splitlines()[-1].strip() for p in pages if p.strip()]
+	lines_per_page = [p.splitlines() for p in pages]
+	non_empty = [lines for p, lines in zip(pages, lines_per_page) if p.strip()]
+	first_lines = [lines[0].strip() for lines in non_empty]
+	last_lines = [lines[-1].strip() for lines in non_empty]
 	head = None
 	tail = None
 	if first_lines and first_lines.count(first_lines[0]) > len(first_lines) // 2:
@@ -48,13 +57,14 @@ def drop_repeating_headers(pages: List[str]) -> List[str]:
 	if last_lines and last_lines.count(last_lines[0]) > len(last_lines) // 2:
 		tail = last_lines[0]
 	result = []
-	for p in pages:
-		lines = p.splitlines()
-		if head and lines and lines[0].strip() == head:
-			lines = lines[1:]
-		if tail and lines and lines[-1].strip() == tail:
-			lines = lines[:-1]
-		result.append("\n".join(lines))
+	for lines in lines_per_page:
+		start, end = 0, len(lines)
+		if head and end and lines[0].strip() == head:
+			start = 1
+		if tail and end > start and lines[end - 1].strip() == tail:
+			end -= 1
+		# Always re-join: it folds \r\n, \x0c, \u2028 etc. into the \n that fix_hyphenation expects
+		result.append("\n".join(lines[start:end]))
 	return result
 
 # -------------------------
@@ -71,28 +81,66 @@ def _page_text_blocks(page: fitz.Page) -> str:
 		return page.get_text("text")
 
 
+# str.count is a C-level scan on any text; str.translate falls back to a slow
+# generic path as soon as the text has non-ASCII (bullets, dashes, quotes)
+_WS_CHARS = " \t\n\r\x0b\x0c"
+
+
 def _chars_count(text: str) -> int:
-	return sum(1 for c in text if not c.isspace())
+	return len(text) - sum(text.count(c) for c in _WS_CHARS)
+
+
+# Tesseract accuracy plateaus around 150-200 DPI; lower it for faster OCR
+OCR_DPI = int(os.environ.get("OCR_DPI", "200"))
+# Deployments that only accept digital PDFs can skip OCR entirely
+OCR_DISABLED = os.environ.get("OCR_DISABLED", "").lower() in {"1", "true", "yes"}
+OCR_WORKERS = os.cpu_count() or 1
+
+
+def init_ocr_worker() -> None:
+	# Call once in a process that runs OCR (pool initializer or CLI). Pages are OCR'd in
+	# parallel threads, so each tesseract child is kept single-threaded.
+	os.environ.setdefault("OMP_THREAD_LIMIT", "1")
+
+
+def _render_page_image(page: fitz.Page, dpi: int = OCR_DPI) -> Image.Image:
+	# Tesseract works on grayscale anyway; one channel is a third of the RGB buffer
+	pix = page.get_pixmap(dpi=dpi, colorspace=fitz.csGRAY, alpha=False)
+	return Image.frombytes("L", (pix.width, pix.height), pix.samples)
 
 
 def _ocr_page_image(img: Image.Image, lang: str = "eng") -> str:
 	return pytesseract.image_to_string(img, lang=lang, config="--oem 1 --psm 6")
 
 
-def extract_pdf_text(data: bytes, ocr_on_demand: bool = True, lang: str = "eng", low_char_threshold: int = 200) -> str:
-	doc = fitz.open(stream=data, filetype="pdf")
+def extract_pdf_text(data: bytes, ocr_on_demand: bool = True, lang: str = "eng", low_char_threshold: int = 200, ocr_workers: Optional[int] = None) -> str:
 	per_page_text: List[str] = []
 	low_text_pages: List[int] = []
-	for i in range(len(doc)):
-		page = doc.load_page(i)
-		text = _page_text_blocks(page)
-		if _chars_count(text) < low_char_threshold:
-			low_text_pages.append(i)
-		per_page_text.append(text)
-	if ocr_on_demand and low_text_pages:
-		images: List[Image.Image] = convert_from_bytes(data, fmt="png")
-		for idx in low_text_pages:
-			ocr_text = _ocr_page_image(images[idx], lang=lang)
+	images: List[Image.Image] = []
+	with fitz.open(stream=data, filetype="pdf") as doc:
+		for i in range(len(doc)):
+			page = doc.load_page(i)
+			text = _page_text_blocks(page)
+			if _chars_count(text) < low_char_threshold:
+				low_text_pages.append(i)
+			per_page_text.append(text)
+		# A digital PDF with a sparse page (cover, photo) has enough text overall
+		total_chars = sum(_chars_count(t) for t in per_page_text)
+		if total_chars >= low_char_threshold * max(1, len(doc)) * 0.5:
+			low_text_pages = []
+		if ocr_on_demand and not OCR_DISABLED and low_text_pages:
+			# Render while the document is open (PyMuPDF is not thread-safe), OCR after closing it
+			images = [_render_page_image(doc.load_page(idx)) for idx in low_text_pages]
+	if images:
+		try:
+			workers = max(1, min(ocr_workers or OCR_WORKERS, len(images)))
+			with ThreadPoolExecutor(max_workers=workers) as ex:
+				ocr_texts = list(ex.map(lambda im: _ocr_page_image(im, lang=lang), images))
+		finally:
+			for img in images:
+				img.close()
+			del images
+		for idx, ocr_text in zip(low_text_pages, ocr_texts):
 			per_page_text[idx] = ocr_text
 	per_page_text = drop_repeating_headers(per_page_text)
 	joined = "\n\n".join(per_page_text)
@@ -101,6 +149,20 @@ def extract_pdf_text(data: bytes, ocr_on_demand: bool = True, lang: str = "eng",
 	return joined
 
 
+def warmup_extraction() -> None:
+	# PyMuPDF and Tesseract initialise lazily on first use; pay that before the first request
+	blank = fitz.open()
+	blank.new_page()
+	data = blank.tobytes()
+	blank.close()
+	with fitz.open(stream=data, filetype="pdf") as doc:
+		_page_text_blocks(doc.load_page(0))
+	try:
+		pytesseract.get_tesseract_version()
+	except Exception:
+		pass
+
+
 def extract_docx_text(data: bytes) -> str:
 	doc = Document(io.BytesIO(data))
 	parts: List[str] = []
@@ -119,51 +181,56 @@ def extract_docx_text(data: bytes) -> str:
 # -------------------------
 
 SYSTEM = (
-	"You Become the SME as per the JD"
-	"You evaluate candidates against a job description from their resume text. "
-	"Follow instructions. Return JSON only. No extra text."
-)
-PROMPT = (
-	"You are an ATS evaluator. Return STRICT JSON only, matching this schema: "
-	"You are an SME based on the JD"
-	"Always try to analyze the JD and the Resume with the keywords.And anlayze how much suitable the candidate will be on the job role."
-	"Try to make sense of the skills and projects mentioned in the resume whether they are real or just a false information"
+	"You are an ATS evaluator acting as the subject-matter expert for the job in <JD>. "
+	"Compare the candidate in <RESUME> against it by keywords, skills and projects, judge how suitable "
+	"they are for the role, and whether the claimed skills and projects look genuine. "
+	"Return STRICT JSON only, no extra text, matching this schema: "
 	"{\"candidate_name\": string|null, \"final_score\": number, \"hard_filter_pass\": boolean, "
 	"\"skill_coverage\": number|null, \"project_relevance\": number|null, \"role_alignment\": number|null, "
 	"\"education_fit\": number|null, \"penalties\": array, \"top_reasons\": array, \"risks\": array, \"evidence_snippets\": array, \"explanation\": string|null}. "
-	"Always include final_score (0-100). Be concise."
+	"Always include final_score (0-100). If unsure, set numeric fields to 0 and arrays to []. Be concise."
 )
-STRICT_PROMPT = (
-	"Return JSON with ALL required keys exactly as specified; do not add or omit keys. "
-	"If unsure, set numeric fields to 0 and arrays to []."
-)
-MAX_CHARS = 20000
+STRICT_PROMPT = "Return JSON with ALL required keys exactly as specified; do not add or omit keys."
+MAX_CHARS = 12000
+# Bump whenever SYSTEM changes so cached scores are invalidated
+PROMPT_VERSION = "2"
+
 
+HTTP_MAX_CONNECTIONS = 32
 
-def _client() -> Groq:
-	api_key = os.environ.get("GROQ_API_KEY")
-	if not api_key:
-		raise RuntimeError("GROQ_API_KEY not set")
-	return Groq(api_key=api_key)
+_CLIENT: AsyncGroq | None = None
+_CLIENT_LOCK = threading.Lock()
+
+
+def _client() -> AsyncGroq:
+	# One client per process so scoring calls share the keep-alive connection pool
+	global _CLIENT
+	if _CLIENT is None:
+		with _CLIENT_LOCK:
+			if _CLIENT is None:
+				api_key = os.environ.get("GROQ_API_KEY")
+				if not api_key:
+					raise RuntimeError("GROQ_API_KEY not set")
+				limits = httpx.Limits(max_connections=HTTP_MAX_CONNECTIONS, max_keepalive_connections=HTTP_MAX_CONNECTIONS)
+				_CLIENT = AsyncGroq(api_key=api_key, http_client=DefaultAsyncHttpxClient(limits=limits))
+	return _CLIENT
 
 
 def _truncate(text: str, max_chars: int = MAX_CHARS) -> str:
 	return text[:max_chars] if len(text) > max_chars else text
 
 
-def chat_json(model: str, system: str, user: str) -> Dict[str, Any]:
+async def chat_json(model: str, system: str, user: str) -> Dict[str, Any]:
 	client = _client()
-	resp = client.chat.completions.create(
+	resp = await client.chat.completions.create(
 		model=model,
 		messages=[{"role": "system", "content": system}, {"role": "user", "content": user}],
 		temperature=0.0,
-		max_tokens=2048,
+		max_tokens=1024,
+		response_format={"type": "json_object"},
 	)
-	content = resp.choices[0].message.content
-	if content.strip().startswith("```"):
-		content = content.strip().strip("`")
-		content = content.split("\n", 1)[-1]
-	return json.loads(content)
+	content = resp.choices[0].message.content or ""
+	return orjson.loads(content)
 
 
 def _ensure_list_str(value: Any) -> List[str]:
@@ -174,49 +241,77 @@ def _ensure_list_str(value: Any) -> List[str]:
 	return [str(value)]
 
 
-def _ensure_schema(obj: Dict[str, Any]) -> Dict[str, Any]:
-	def num(v, default=0.0):
-		try:
-			return float(v)
-		except Exception:
-			return float(default)
-	out: Dict[str, Any] = {}
-	out["candidate_name"] = obj.get("candidate_name")
-	out["final_score"] = max(0.0, min(100.0, num(obj.get("final_score"), 0)))
-	out["hard_filter_pass"] = bool(obj.get("hard_filter_pass", True))
-	out["skill_coverage"] = num(obj.get("skill_coverage"), 0)
-	out["project_relevance"] = num(obj.get("project_relevance"), 0)
-	out["role_alignment"] = num(obj.get("role_alignment"), 0)
-	out["education_fit"] = num(obj.get("education_fit"), 0)
-	raw_pen = obj.get("penalties") or []
-	coerced: List[Dict[str, Any]] = []
-	for p in raw_pen if isinstance(raw_pen, list) else [raw_pen]:
-		if isinstance(p, dict):
-			coerced.append(p)
-		else:
-			coerced.append({"reason": str(p), "points": 0})
-	out["penalties"] = coerced
-	out["top_reasons"] = _ensure_list_str(obj.get("top_reasons"))
-	out["risks"] = _ensure_list_str(obj.get("risks"))
-	out["evidence_snippets"] = _ensure_list_str(obj.get("evidence_snippets"))
-	out["explanation"] = obj.get("explanation")
-	return out
-
-
-def score_resume(model: str, jd_text: str, resume_text: str) -> Dict[str, Any]:
-	user = f"<JD>\n{jd_text}\n</JD>\n<RESUME>\n{resume_text}\n</RESUME>\n{PROMPT}"
+def _num(value: Any, default: float = 0.0) -> float:
 	try:
-		obj = chat_json(model=model, system=SYSTEM, user=user)
+		return float(value)
+	except Exception:
+		return float(default)
+
+
+class ScoreResult(BaseModel):
+	# Validators run in "before" mode and never raise, so any LLM output coerces
+	candidate_name: Optional[str] = None
+	final_score: float = 0.0
+	hard_filter_pass: bool = True
+	skill_coverage: float = 0.0
+	project_relevance: float = 0.0
+	role_alignment: float = 0.0
+	education_fit: float = 0.0
+	penalties: List[Dict[str, Any]] = []
+	top_reasons: List[str] = []
+	risks: List[str] = []
+	evidence_snippets: List[str] = []
+	explanation: Optional[str] = None
+
+	@field_validator("candidate_name", "explanation", mode="before")
+	@classmethod
+	def _opt_str(cls, v: Any) -> Optional[str]:
+		return None if v is None else str(v)
+
+	@field_validator("final_score", mode="before")
+	@classmethod
+	def _clamp_score(cls, v: Any) -> float:
+		return max(0.0, min(100.0, _num(v)))
+
+	@field_validator("skill_coverage", "project_relevance", "role_alignment", "education_fit", mode="before")
+	@classmethod
+	def _to_num(cls, v: Any) -> float:
+		return _num(v)
+
+	@field_validator("hard_filter_pass", mode="before")
+	@classmethod
+	def _to_bool(cls, v: Any) -> bool:
+		return bool(v)
+
+	@field_validator("penalties", mode="before")
+	@classmethod
+	def _to_penalties(cls, v: Any) -> List[Dict[str, Any]]:
+		raw = v or []
+		return [p if isinstance(p, dict) else {"reason": str(p), "points": 0} for p in (raw if isinstance(raw, list) else [raw])]
+
+	@field_validator("top_reasons", "risks", "evidence_snippets", mode="before")
+	@classmethod
+	def _to_list_str(cls, v: Any) -> List[str]:
+		return _ensure_list_str(v)
+
+
+async def score_resume(model: str, jd_text: str, resume_text: str) -> Dict[str, Any]:
+	user = f"<JD>\n{jd_text}\n</JD>\n<RESUME>\n{resume_text}\n</RESUME>"
+	try:
+		obj = await chat_json(model=model, system=SYSTEM, user=user)
 		if "final_score" in obj:
-			return _ensure_schema(obj)
+			return ScoreResult.model_validate(obj).model_dump()
 	except Exception:
 		pass
-	user2 = f"<JD>\n{jd_text}\n</JD>\n<RESUME>\n{resume_text}\n</RESUME>\n{PROMPT}\n{STRICT_PROMPT}"
 	try:
-		obj2 = chat_json(model=model, system=SYSTEM, user=user2)
-		return _ensure_schema(obj2)
+		obj2 = await chat_json(model=model, system=f"{SYSTEM} {STRICT_PROMPT}", user=user)
+		return ScoreResult.model_validate(obj2).model_dump()
 	except Exception:
-		return _ensure_schema({"final_score": 0})
+		return ScoreResult().model_dump()
+
+
+async def _score_all(model: str, jd_text: str, resume_texts: List[str]) -> List[Dict[str, Any]]:
+	return await asyncio.gather(*(score_resume(model, jd_text, r) for r in resume_texts))
 
 # -------------------------
 # Main
@@ -237,6 +332,7 @@ def run():
 	print(f"Output: {out_dir}")
 	print(f"JD: {jd_file}")
 	out_dir.mkdir(parents=True, exist_ok=True)
+	init_ocr_worker()
 
 	# 1) Extract
 	paths: List[Path] = []
@@ -264,10 +360,10 @@ def run():
 	rows: List[Dict[str, Any]] = []
 	jsonl_path = out_dir / "scores.jsonl"
 	csv_path = out_dir / "scores.csv"
+	resume_texts = [_truncate(t.read_text(encoding="utf-8", errors="ignore")) for t in txts]
+	recs = asyncio.run(_score_all(model, jd_text, resume_texts))
 	with jsonl_path.open("w", encoding="utf-8") as jf:
-		for t in txts:
-			resume_text = _truncate(t.read_text(encoding="utf-8", errors="ignore"))
-			rec = score_resume(model, jd_text, resume_text)
+		for t, rec in zip(txts, recs):
 			rec["file"] = t.name
 			jf.write(json.dumps(rec, ensure_ascii=False) + "\n")
 			rows.append(rec)
@@ -123,6 +123,61 @@ clearBtn.addEventListener('click', () => {
   table.classList.add('hidden');
 });
 
+// --- Results ---
+async function readNdjson(res, onItem) {
+  const reader = res.body.getReader();
+  const decoder = new TextDecoder();
+  let buffer = '';
+  for (;;) {
+    const { value, done } = await reader.read();
+    buffer += decoder.decode(value || new Uint8Array(), { stream: !done });
+    const lines = buffer.split('\n');
+    buffer = lines.pop();
+    lines.filter(l => l.trim()).forEach(l => onItem(JSON.parse(l)));
+    if (done) break;
+  }
+  if (buffer.trim()) onItem(JSON.parse(buffer));
+}
+
+// Insert a result row keeping the table sorted by score (highest first)
+function addResultRow(r) {
+  const tr = document.createElement('tr');
+  const td = (t) => { const c = document.createElement('td'); c.textContent = t; return c; };
+  const score = Number(r.final_score) || 0;
+  tr.dataset.id = r.id ?? '';
+  tr.dataset.score = score;
+
+  tr.appendChild(td(r.file || ''));
+  tr.appendChild(td(r.candidate_name || ''));
+  tr.appendChild(td(r.final_score ?? ''));
+  tr.appendChild(td(String(r.hard_filter_pass ?? '')));
+  tr.appendChild(td(r.explanation || ''));
+  tr.appendChild(td((r.top_reasons || []).join(' | ')));
+
+  // --- Manual Selection UI ---
+  const selectTd = document.createElement('td');
+  selectTd.innerHTML = `
+    <label style="display:flex;align-items:center;gap:8px;cursor:pointer;">
+      <input type="checkbox" class="manual_selection">
+      <span>Selected</span>
+    </label>
+    <input type="text" class="manual_reason" placeholder="Reason (if selected)" disabled
+           style="margin-top:6px;width:100%;padding:6px;border:1px solid #ccc;border-radius:4px;">
+  `;
+
+  // enable/disable reason box
+  const checkbox = selectTd.querySelector(".manual_selection");
+  const reason = selectTd.querySelector(".manual_reason");
+  checkbox.addEventListener("change", () => {
+    reason.disabled = !checkbox.checked;
+  });
+
+  tr.appendChild(selectTd);
+
+  const next = Array.from(tbody.children).find(row => Number(row.dataset.score) < score);
+  tbody.insertBefore(tr, next || null);
+}
+
 // --- Run Screening ---
 runBtn.addEventListener('click', async () => {
   statusEl.textContent = '';
@@ -145,44 +200,25 @@ runBtn.addEventListener('click', async () => {
       const err = await res.json().catch(() => ({}));
       throw new Error(err.detail || `Request failed: ${res.status}`);
     }
-    const rows = await res.json();
-    statusEl.textContent = `Received ${rows.length} results.`;
-
-    rows.forEach((r, idx) => {
-      const tr = document.createElement('tr');
-      const td = (t) => { const c = document.createElement('td'); c.textContent = t; return c; };
-
-      tr.appendChild(td(r.file || ''));
-      tr.appendChild(td(r.candidate_name || ''));
-      tr.appendChild(td(r.final_score ?? ''));
-      tr.appendChild(td(String(r.hard_filter_pass ?? '')));
-      tr.appendChild(td(r.explanation || ''));
-      tr.appendChild(td((r.top_reasons || []).join(' | ')));
-
-      // --- New: Manual Selection UI ---
-      const selectTd = document.createElement('td');
-selectTd.innerHTML = `
-  <label style="display:flex;align-items:center;gap:8px;cursor:pointer;">
-    <input type="checkbox" class="manual_selection" data-index="${idx}">
-    <span>Selected</span>
-  </label>
-  <input type="text" class="manual_reason" placeholder="Reason (if selected)" disabled
-         style="margin-top:6px;width:100%;padding:6px;border:1px solid #ccc;border-radius:4px;">
-`;
-
-// enable/disable reason box
-const checkbox = selectTd.querySelector(".manual_selection");
-const reason = selectTd.querySelector(".manual_reason");
-checkbox.addEventListener("change", () => {
-  reason.disabled = !checkbox.checked;
-});
-
-tr.appendChild(selectTd);
-
-
-      tbody.appendChild(tr);
+    // Results stream in as NDJSON, one line per resume; failures carry an "error" field
+    let count = 0;
+    const errors = [];
+    await readNdjson(res, (r) => {
+      if (r.error) {
+        errors.push(`${r.file || 'resume'}: ${r.error}`);
+        toastMsg(`Error: ${r.file || 'resume'}: ${r.error}`, 4000);
+      }
+      if (r.final_score === undefined) return; // scoring failed, nothing to show
+      addResultRow(r);
+      count += 1;
+      showOverlay(false);
+      table.classList.remove('hidden');
+      statusEl.textContent = `Received ${count} results…`;
     });
-    table.classList.remove('hidden');
+    if (!count && errors.length) throw new Error(errors.join('; '));
+    statusEl.textContent = errors.length
+      ? `Received ${count} results, ${errors.length} with errors: ${errors.join('; ')}`
+      : `Received ${count} results.`;
   } catch (err) {
     statusEl.textContent = '';
     toastMsg(`Error: ${err.message}`);
@@ -201,6 +237,7 @@ document.getElementById('saveBtn').addEventListener('click', async () => {
     const cols = tr.querySelectorAll('td');
 
     rowsData.push({
+      id: tr.dataset.id ? Number(tr.dataset.id) : null,
       file: cols[0].textContent,
       candidate_name: cols[1].textContent,
       final_score: parseFloat(cols[2].textContent) || 0,